@@ -11,7 +11,7 @@ import os
 import pymysql
 from dotenv import find_dotenv, load_dotenv
 from google.cloud.sql.connector import Connector
-from sqlalchemy import func
+from sqlalchemy import String, cast, func
 from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.sql.ddl import CreateColumn
 from sqlalchemy.sql.functions import GenericFunction
@@ -180,17 +180,21 @@ def get_json_extract_field(session, base_field, key):
 
 
 def get_aggreated_field(session: Session, column_name: str, alias: str):
+    """
+    Aggregates the column into a comma-separated string, except on MySQL
+    which returns a JSON array (GROUP_CONCAT there is capped by
+    group_concat_max_len and silently truncates).
+    """
     if session.bind is None:
         raise ValueError("Session is not bound to a database")
 
-    if session.bind.dialect.name == "postgresql":
-        return func.array_agg(column_name).label(alias)
-    elif session.bind.dialect.name == "mysql":
+    if session.bind.dialect.name == "mysql":
         return func.json_arrayagg(column_name).label(alias)
     elif session.bind.dialect.name == "sqlite":
+        # GROUP_CONCAT uses a comma as the separator by default
         return func.group_concat(column_name).label(alias)
     else:
-        return func.array_agg(column_name).label(alias)
+        return func.string_agg(cast(column_name, String), ",").label(alias)
 
 
 class json_table(GenericFunction):
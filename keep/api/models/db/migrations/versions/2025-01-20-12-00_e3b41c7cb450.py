@@ -0,0 +1,82 @@
+"""Add indexes for topology lookups
+
+Revision ID: e3b41c7cb450
+Revises: d359baaf0836
+Create Date: 2025-01-20 12:00:00.000000
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e3b41c7cb450"
+down_revision = "d359baaf0836"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("topologyservice", schema=None) as batch_op:
+        batch_op.create_index(
+            "idx_topologyservice_tenant_service",
+            ["tenant_id", "service"],
+            unique=False,
+        )
+
+    with op.batch_alter_table("topologyserviceapplication", schema=None) as batch_op:
+        batch_op.create_index(
+            "idx_topologyserviceapplication_application_service",
+            ["application_id", "service_id"],
+            unique=False,
+        )
+
+    with op.batch_alter_table("topologyservicedependency", schema=None) as batch_op:
+        batch_op.create_index(
+            "idx_topologyservicedependency_service_id",
+            ["service_id"],
+            unique=False,
+        )
+        batch_op.create_index(
+            "idx_topologyservicedependency_depends_on_service_id",
+            ["depends_on_service_id"],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    # On MySQL the new indexes cover the tenant_id, application_id, service_id
+    # and depends_on_service_id foreign keys, so InnoDB dropped its implicit FK
+    # indexes when they were created. Put a plain index back first, otherwise
+    # the drop fails with error 1553.
+    is_mysql = op.get_bind().dialect.name == "mysql"
+
+    with op.batch_alter_table("topologyservicedependency", schema=None) as batch_op:
+        if is_mysql:
+            batch_op.create_index(
+                "ix_topologyservicedependency_service_id",
+                ["service_id"],
+                unique=False,
+            )
+            batch_op.create_index(
+                "ix_topologyservicedependency_depends_on_service_id",
+                ["depends_on_service_id"],
+                unique=False,
+            )
+        batch_op.drop_index("idx_topologyservicedependency_depends_on_service_id")
+        batch_op.drop_index("idx_topologyservicedependency_service_id")
+
+    with op.batch_alter_table("topologyserviceapplication", schema=None) as batch_op:
+        if is_mysql:
+            batch_op.create_index(
+                "ix_topologyserviceapplication_application_id",
+                ["application_id"],
+                unique=False,
+            )
+        batch_op.drop_index("idx_topologyserviceapplication_application_service")
+
+    with op.batch_alter_table("topologyservice", schema=None) as batch_op:
+        if is_mysql:
+            batch_op.create_index(
+                "ix_topologyservice_tenant_id", ["tenant_id"], unique=False
+            )
+        batch_op.drop_index("idx_topologyservice_tenant_service")
@@ -3,7 +3,7 @@ from typing import List, Optional
 from uuid import UUID, uuid4
 
 from pydantic import BaseModel
-from sqlalchemy import DateTime, ForeignKey
+from sqlalchemy import DateTime, ForeignKey, Index
 from sqlmodel import JSON, Column, Field, Relationship, SQLModel, func
 
 
@@ -11,6 +11,14 @@ class TopologyServiceApplication(SQLModel, table=True):
     service_id: int = Field(foreign_key="topologyservice.id", primary_key=True)
     application_id: UUID = Field(foreign_key="topologyapplication.id", primary_key=True)
 
+    __table_args__ = (
+        Index(
+            "idx_topologyserviceapplication_application_service",
+            "application_id",
+            "service_id",
+        ),
+    )
+
 
 class TopologyApplication(SQLModel, table=True):
     id: UUID = Field(default_factory=uuid4, primary_key=True)
@@ -62,10 +70,23 @@ class TopologyService(SQLModel, table=True):
         },
     )
 
+    # Dependencies where this service is the callee (B in A->B); read-only
+    # so deletes keep relying on the FK's ON DELETE CASCADE
+    reverse_dependencies: List["TopologyServiceDependency"] = Relationship(
+        sa_relationship_kwargs={
+            "foreign_keys": "[TopologyServiceDependency.depends_on_service_id]",
+            "viewonly": True,
+        },
+    )
+
     applications: List[TopologyApplication] = Relationship(
         back_populates="services", link_model=TopologyServiceApplication
     )
 
+    __table_args__ = (
+        Index("idx_topologyservice_tenant_service", "tenant_id", "service"),
+    )
+
     class Config:
         orm_mode = True
         unique_together = ["tenant_id", "service", "environment", "source_provider_id"]
@@ -101,6 +122,14 @@ class TopologyServiceDependency(SQLModel, table=True):
         }
     )
 
+    __table_args__ = (
+        Index("idx_topologyservicedependency_service_id", "service_id"),
+        Index(
+            "idx_topologyservicedependency_depends_on_service_id",
+            "depends_on_service_id",
+        ),
+    )
+
 
 class TopologyServiceDtoBase(BaseModel, extra="ignore"):
     source_provider_id: Optional[str]
@@ -194,11 +223,9 @@ class TopologyServiceDtoOut(TopologyServiceDtoBase):
     application_ids: List[UUID]
     updated_at: Optional[datetime]
 
-    @classmethod
-    def from_orm(
-        cls, service: "TopologyService", application_ids: List[UUID]
-    ) -> "TopologyServiceDtoOut":
-        return cls(
+    @staticmethod
+    def _fields_from_orm(service: "TopologyService") -> dict:
+        return dict(
             id=service.id,
             source_provider_id=service.source_provider_id,
             repository=service.repository,
@@ -215,14 +242,46 @@ class TopologyServiceDtoOut(TopologyServiceDtoBase):
             manufacturer=service.manufacturer,
             category=service.category,
             dependencies=[
-                TopologyServiceDependencyDto(
+                dict(
                     serviceId=dep.depends_on_service_id,
                     protocol=dep.protocol,
                     serviceName=dep.dependent_service.service,
                 )
                 for dep in service.dependencies
             ],
-            application_ids=application_ids,
             updated_at=service.updated_at,
             namespace=service.namespace,
         )
+
+    @classmethod
+    def from_orm(
+        cls, service: "TopologyService", application_ids: List[UUID]
+    ) -> "TopologyServiceDtoOut":
+        return cls(
+            **cls._fields_from_orm(service),
+            application_ids=application_ids,
+        )
+
+    @classmethod
+    def from_orm_list(
+        cls,
+        services: List["TopologyService"],
+        application_ids_by_service: dict[int, List[UUID]],
+    ) -> List["TopologyServiceDtoOut"]:
+        # Skips pydantic validation: every value is read off ORM rows whose
+        # column types already match the DTO fields. Route responses are still
+        # validated by FastAPI, but internal callers get these objects as-is.
+        service_dtos = []
+        for service in services:
+            fields = cls._fields_from_orm(service)
+            fields["dependencies"] = [
+                TopologyServiceDependencyDto.construct(**dependency)
+                for dependency in fields["dependencies"]
+            ]
+            service_dtos.append(
+                cls.construct(
+                    **fields,
+                    application_ids=application_ids_by_service.get(service.id, []),
+                )
+            )
+        return service_dtos
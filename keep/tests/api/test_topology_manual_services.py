@@ -1,6 +1,9 @@
+import httpx
 import pytest
+import pytest_asyncio
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
-from sqlmodel import Session
+from sqlmodel import Session, select
 
 from keep.api.core.db import get_session
 from keep.api.models.db.topology import TopologyService, TopologyServiceDependency
@@ -8,20 +11,44 @@ from keep.api.routes.topology import router
 from keep.identitymanager.authenticatedentity import AuthenticatedEntity
 from keep.identitymanager.identitymanagerfactory import IdentityManagerFactory
 
+pytestmark = pytest.mark.asyncio
+
+# Build the app and register the router once at import; tests only swap the
+# dependency overrides
+_app = FastAPI()
+_app.include_router(router)
+
+@pytest.fixture(scope="module", autouse=True)
+def no_leaked_overrides():
+    """Make sure no dependency overrides leaked onto the shared app."""
+    assert not _app.dependency_overrides
+    yield
+
 @pytest.fixture
-def client(client_session, auth_verifier):
-    """Create a test client with the necessary dependencies overridden."""
-    from fastapi import FastAPI
-    app = FastAPI()
-    app.include_router(router)
+def overrides(client_session, auth_verifier):
+    """Override the app dependencies for the duration of a test."""
+    _app.dependency_overrides[get_session] = client_session
+    _app.dependency_overrides[IdentityManagerFactory.get_auth_verifier] = auth_verifier
+    try:
+        yield
+    finally:
+        _app.dependency_overrides.clear()
 
-    # Override dependencies
-    app.dependency_overrides[get_session] = client_session
-    app.dependency_overrides[IdentityManagerFactory.get_auth_verifier] = auth_verifier
+@pytest_asyncio.fixture
+async def client(overrides):
+    """Create an in-process async client with the necessary dependencies overridden."""
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=_app), base_url="http://test"
+    ) as async_client:
+        yield async_client
 
-    return TestClient(app)
+@pytest.fixture
+def sync_client(overrides):
+    """Create a sync test client, for tests that need the ASGI lifespan to run."""
+    with TestClient(_app) as test_client:
+        yield test_client
 
-def test_create_manual_service(client, session, auth_entity):
+async def test_create_manual_service(client, session, auth_entity):
     """Test creating a manual service"""
     service_data = {
         "service": "test-service",
@@ -33,7 +60,7 @@ def test_create_manual_service(client, session, auth_entity):
         "environment": "production"
     }
 
-    response = client.post("/services", json=service_data)
+    response = await client.post("/services", json=service_data)
     assert response.status_code == 200
     
     created_service = response.json()
@@ -43,7 +70,7 @@ def test_create_manual_service(client, session, auth_entity):
     assert created_service["created_by"] == auth_entity.email
     assert created_service["is_editable"] is True
 
-def test_update_manual_service(client, session):
+async def test_update_manual_service(client, session):
     """Test updating a manual service"""
     # First create a service
     service = TopologyService(
@@ -64,7 +91,7 @@ def test_update_manual_service(client, session):
         "team": "New Team"
     }
 
-    response = client.put(f"/services/{service.id}", json=update_data)
+    response = await client.put(f"/services/{service.id}", json=update_data)
     assert response.status_code == 200
     
     updated_service = response.json()
@@ -72,7 +99,69 @@ def test_update_manual_service(client, session):
     assert updated_service["description"] == update_data["description"]
     assert updated_service["team"] == update_data["team"]
 
-def test_delete_manual_service(client, session):
+async def test_update_manual_service_dependencies(client, session):
+    """Test that updating dependencies deletes, updates and inserts only what changed"""
+    services = {
+        name: TopologyService(
+            tenant_id="test-tenant",
+            service=name,
+            display_name=name,
+            is_manual=True,
+            created_by="test@example.com",
+            is_editable=True
+        )
+        for name in ["service-a", "service-b", "service-c", "service-d"]
+    }
+    session.add_all(services.values())
+    session.commit()
+
+    service_a = services["service-a"]
+    session.add_all([
+        TopologyServiceDependency(
+            service_id=service_a.id,
+            depends_on_service_id=services["service-b"].id,
+            protocol="http"
+        ),
+        TopologyServiceDependency(
+            service_id=service_a.id,
+            depends_on_service_id=services["service-c"].id,
+            protocol="http"
+        ),
+    ])
+    session.commit()
+
+    # A->B(http), A->C becomes A->B(grpc), A->D
+    update_data = {
+        "service": "service-a",
+        "display_name": "service-a",
+        "dependencies": {"service-b": "grpc", "service-d": "http"}
+    }
+
+    response = await client.put(f"/services/{service_a.id}", json=update_data)
+    assert response.status_code == 200
+
+    expected = {
+        services["service-b"].id: "grpc",
+        services["service-d"].id: "http",
+    }
+    dependencies = session.exec(
+        select(TopologyServiceDependency).where(
+            TopologyServiceDependency.service_id == service_a.id
+        )
+    ).all()
+    assert {dep.depends_on_service_id: dep.protocol for dep in dependencies} == expected
+
+    # The response must not include the dependency removed by the bulk delete
+    updated_service = response.json()
+    assert {
+        dep["serviceId"]: dep["protocol"] for dep in updated_service["dependencies"]
+    } == expected
+    assert sorted(dep["serviceName"] for dep in updated_service["dependencies"]) == [
+        "service-b",
+        "service-d",
+    ]
+
+async def test_delete_manual_service(client, session):
     """Test deleting a manual service"""
     service = TopologyService(
         tenant_id="test-tenant",
@@ -85,14 +174,14 @@ def test_delete_manual_service(client, session):
     session.add(service)
     session.commit()
 
-    response = client.delete(f"/services/{service.id}")
+    response = await client.delete(f"/services/{service.id}")
     assert response.status_code == 200
 
     # Verify service is deleted
     deleted_service = session.get(TopologyService, service.id)
     assert deleted_service is None
 
-def test_create_dependency(client, session):
+async def test_create_dependency(client, session):
     """Test creating a dependency between services"""
     # Create two services
     service1 = TopologyService(
@@ -114,7 +203,7 @@ def test_create_dependency(client, session):
     session.add_all([service1, service2])
     session.commit()
 
-    response = client.post(
+    response = await client.post(
         f"/services/{service1.id}/dependencies/{service2.id}",
         params={"protocol": "http"}
     )
@@ -127,7 +216,7 @@ def test_create_dependency(client, session):
     assert dependency.depends_on_service_id == service2.id
     assert dependency.protocol == "http"
 
-def test_delete_dependency(client, session):
+async def test_delete_dependency(client, session):
     """Test deleting a dependency between services"""
     # Create two services and a dependency
     service1 = TopologyService(
@@ -157,14 +246,14 @@ def test_delete_dependency(client, session):
     session.add(dependency)
     session.commit()
 
-    response = client.delete(f"/services/{service1.id}/dependencies/{service2.id}")
+    response = await client.delete(f"/services/{service1.id}/dependencies/{service2.id}")
     assert response.status_code == 200
 
     # Verify dependency is deleted
     deleted_dependency = session.get(TopologyServiceDependency, dependency.id)
     assert deleted_dependency is None
 
-def test_cannot_edit_provider_service(client, session):
+async def test_cannot_edit_provider_service(client, session):
     """Test that provider-sourced services cannot be edited"""
     service = TopologyService(
         tenant_id="test-tenant",
@@ -181,10 +270,10 @@ def test_cannot_edit_provider_service(client, session):
         "display_name": "Updated Service"
     }
 
-    response = client.put(f"/services/{service.id}", json=update_data)
+    response = await client.put(f"/services/{service.id}", json=update_data)
     assert response.status_code == 400  # Should fail with bad request
 
-def test_cannot_delete_provider_service(client, session):
+async def test_cannot_delete_provider_service(client, session):
     """Test that provider-sourced services cannot be deleted"""
     service = TopologyService(
         tenant_id="test-tenant",
@@ -197,5 +286,5 @@ def test_cannot_delete_provider_service(client, session):
     session.add(service)
     session.commit()
 
-    response = client.delete(f"/services/{service.id}")
+    response = await client.delete(f"/services/{service.id}")
     assert response.status_code == 400  # Should fail with bad request 
\ No newline at end of file
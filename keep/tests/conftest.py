@@ -1,30 +1,72 @@
 import os
 import pytest
+from sqlalchemy import event
 from sqlmodel import Session, SQLModel, create_engine
 from sqlalchemy.pool import StaticPool
 
 from keep.api.core.db import get_session
 from keep.identitymanager.authenticatedentity import AuthenticatedEntity
 
-# Test database URL
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Test database URL. A named, shared-cache in-memory database means every
+# connection in the process sees the same schema; a plain ":memory:" URL gives
+# each new connection its own empty database, so don't switch back to it.
+SQLALCHEMY_DATABASE_URL = (
+    "sqlite+pysqlite:///file:keep_test?mode=memory&cache=shared&uri=true"
+)
 
-@pytest.fixture(name="engine")
+@pytest.fixture(name="engine", scope="session")
 def engine_fixture():
-    """Create a new database engine for each test."""
+    """Create the database engine and schema once per test session."""
     engine = create_engine(
         SQLALCHEMY_DATABASE_URL,
-        connect_args={"check_same_thread": False},
+        connect_args={"check_same_thread": False, "uri": True},
+        # StaticPool keeps one connection open, which pins the lifetime of
+        # the shared in-memory database to the engine.
         poolclass=StaticPool,
     )
+
+    # pysqlite defers BEGIN on its own, which breaks SAVEPOINT semantics.
+    # Let SQLAlchemy emit BEGIN itself so the per-test rollback is real.
+    @event.listens_for(engine, "connect")
+    def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    # Durability is pointless for a throwaway test database; these pragmas
+    # are test-only and must not be copied to the production engine
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=MEMORY")
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
     SQLModel.metadata.create_all(engine)
-    return engine
+    yield engine
+    engine.dispose()
 
 @pytest.fixture(name="session")
 def session_fixture(engine):
-    """Create a new database session for each test."""
-    with Session(engine) as session:
+    """
+    Create a new database session for each test.
+
+    The session is joined into an outer transaction that is rolled back on
+    teardown, so commits made by the test (or the code under test) only
+    release a SAVEPOINT and never leak into the next test.
+    """
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
         yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
 
 @pytest.fixture(name="client_session")
 def client_session_fixture(session):
@@ -47,4 +89,4 @@ def auth_verifier_fixture(auth_entity):
     """Override the auth verifier for testing."""
     def get_auth_verifier_override():
         return lambda: auth_entity
-    return get_auth_verifier_override 
\ No newline at end of file
+    return get_auth_verifier_override
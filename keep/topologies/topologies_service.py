@@ -1,10 +1,12 @@
+import functools
 import json
 import logging
 from typing import List, Optional
 from uuid import UUID
 
 from pydantic import ValidationError
-from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
 
 from keep.api.core.db_utils import get_aggreated_field
@@ -50,6 +52,8 @@ def get_service_application_ids_dict(
     session: Session, service_ids: List[int]
 ) -> dict[int, List[UUID]]:
     # TODO: add proper types
+    if session.bind is None:
+        raise ValueError("Session is not bound to a database")
     query = (
         select(
             TopologyServiceApplication.service_id,
@@ -63,30 +67,49 @@ def get_service_application_ids_dict(
         .group_by(TopologyServiceApplication.service_id)
     )
     results = session.exec(query).all()
-    dialect_name = session.bind.dialect.name if session.bind else ""
-    result = {}
-    if session.bind is None:
-        raise ValueError("Session is not bound to a database")
-    for application_id, service_ids in results:
-        if dialect_name == "postgresql":
-            # PostgreSQL returns a list of UUIDs
-            pass
-        elif dialect_name == "mysql":
-            # MySQL returns a JSON string, so we need to parse it
-            service_ids = json.loads(service_ids)
-        elif dialect_name == "sqlite":
-            # SQLite returns a comma-separated string
-            service_ids = [UUID(id) for id in service_ids.split(",")]
-        else:
-            if service_ids and isinstance(service_ids[0], UUID):
-                # If it's already a list of UUIDs (like in PostgreSQL), use it as is
-                pass
-            else:
-                # For any other case, try to convert to UUID
-                service_ids = [UUID(str(id)) for id in service_ids]
-        result[application_id] = service_ids
 
-    return result
+    if session.bind.dialect.name == "mysql":
+        # MySQL returns a JSON array string
+        def parse(application_ids: str) -> List[str]:
+            return json.loads(application_ids)
+
+    else:
+        # Every other dialect returns a comma-separated string
+        def parse(application_ids: str) -> List[str]:
+            return application_ids.split(",")
+
+    return {
+        service_id: list(map(UUID, parse(application_ids)))
+        for service_id, application_ids in results
+    }
+
+
+@functools.lru_cache(maxsize=128)
+def parse_service_names(services: str) -> tuple[str, ...]:
+    """Parse comma-separated service names into a sorted, deduplicated tuple."""
+    return tuple(
+        sorted({service.strip() for service in services.split(",") if service.strip()})
+    )
+
+
+def get_services_by_name(
+    session: Session, tenant_id: str, service_names: List[str]
+) -> dict[str, TopologyService]:
+    """Fetch the tenant's services matching the given names in a single query."""
+    if not service_names:
+        return {}
+    services = session.exec(
+        select(TopologyService).where(
+            TopologyService.tenant_id == tenant_id,
+            TopologyService.service.in_(service_names),
+        )
+    ).all()
+    # Service names aren't unique per tenant, keep the first match like
+    # a per-name .first() lookup would
+    services_by_name = {}
+    for service in services:
+        services_by_name.setdefault(service.service, service)
+    return services_by_name
 
 
 class TopologiesService:
@@ -105,28 +128,47 @@ class TopologiesService:
         # services and environments and cmdbs
         # the idea is that we show the service topology regardless of the underlying provider/env
         if services is not None:
-            query = query.where(TopologyService.service.in_(services.split(",")))
-
-            service_instance = session.exec(query).first()
-            if not service_instance:
-                return []
-
-            services = session.exec(
-                select(TopologyServiceDependency)
-                .where(
-                    TopologyServiceDependency.depends_on_service_id
-                    == service_instance.id
+            # Fetch the requested services together with the services that
+            # depend on them, eager-loading everything the DTOs need
+            matched_services = session.exec(
+                query.where(
+                    TopologyService.service.in_(parse_service_names(services))
+                ).options(
+                    selectinload(TopologyService.dependencies).selectinload(
+                        TopologyServiceDependency.dependent_service
+                    ),
+                    selectinload(TopologyService.reverse_dependencies)
+                    .selectinload(TopologyServiceDependency.service)
+                    .selectinload(TopologyService.dependencies)
+                    .selectinload(TopologyServiceDependency.dependent_service),
                 )
-                .options(joinedload(TopologyServiceDependency.service))
             ).all()
-            services = [service_instance, *[service.service for service in services]]
+
+            services_by_id = {}
+            for service in matched_services:
+                services_by_id[service.id] = service
+                for reverse_dependency in service.reverse_dependencies:
+                    services_by_id.setdefault(
+                        reverse_dependency.service.id, reverse_dependency.service
+                    )
+            services = list(services_by_id.values())
         else:
+            if not include_empty_deps:
+                # Skip services without dependencies in SQL rather than
+                # loading them only to drop them below
+                query = query.where(
+                    select(TopologyServiceDependency.id)
+                    .where(TopologyServiceDependency.service_id == TopologyService.id)
+                    .exists()
+                )
+
             # Fetch services for the tenant
             services = session.exec(
                 query.options(
-                    selectinload(TopologyService.dependencies).selectinload(
-                        TopologyServiceDependency.dependent_service
-                    )
+                    selectinload(TopologyService.dependencies)
+                    .selectinload(TopologyServiceDependency.dependent_service)
+                    # only the name of the dependent service ends up in the DTO
+                    .load_only(TopologyService.id, TopologyService.service)
                 )
             ).all()
 
@@ -136,13 +178,14 @@ class TopologiesService:
 
         logger.info(f"Service to app ids: {service_to_app_ids}")
 
-        service_dtos = [
-            TopologyServiceDtoOut.from_orm(
-                service, application_ids=service_to_app_ids.get(service.id, [])
-            )
-            for service in services
-            if service.dependencies or include_empty_deps
-        ]
+        service_dtos = TopologyServiceDtoOut.from_orm_list(
+            [
+                service
+                for service in services
+                if service.dependencies or include_empty_deps
+            ],
+            service_to_app_ids,
+        )
 
         return service_dtos
 
@@ -201,16 +244,15 @@ class TopologiesService:
         session.add(new_application)
         session.flush()  # This assigns an ID to new_application
 
-        # Create TopologyServiceApplication links
-        new_links = [
-            TopologyServiceApplication(
-                service_id=service.id, application_id=new_application.id
-            )
-            for service in services_to_add
-            if service.id
-        ]
-
-        session.add_all(new_links)
+        # Create TopologyServiceApplication links in a single bulk INSERT
+        session.execute(
+            insert(TopologyServiceApplication),
+            [
+                {"service_id": service.id, "application_id": new_application.id}
+                for service in services_to_add
+                if service.id
+            ],
+        )
         session.commit()
 
         session.expire(new_application, ["services"])
@@ -244,39 +286,49 @@ class TopologiesService:
 
         new_service_ids = set(service.id for service in application.services)
 
-        # Remove existing links not in the update request
-        session.query(TopologyServiceApplication).where(
-            TopologyServiceApplication.application_id == application_id
-        ).where(TopologyServiceApplication.service_id.not_in(new_service_ids)).delete()
+        # Diff the requested services against the existing links once, so
+        # unchanged links are neither deleted nor re-inserted
+        existing_service_ids = set(
+            session.exec(
+                select(TopologyServiceApplication.service_id).where(
+                    TopologyServiceApplication.application_id == application_id
+                )
+            ).all()
+        )
+        services_to_remove_ids = existing_service_ids - new_service_ids
+        services_to_add_ids = new_service_ids - existing_service_ids
 
-        # Add new links
-        existing_links = session.exec(
-            select(TopologyServiceApplication.service_id).where(
-                TopologyServiceApplication.application_id == application_id
+        # Remove existing links not in the update request
+        if services_to_remove_ids:
+            session.execute(
+                delete(TopologyServiceApplication)
+                .where(TopologyServiceApplication.application_id == application_id)
+                .where(
+                    TopologyServiceApplication.service_id.in_(services_to_remove_ids)
+                )
+                .execution_options(synchronize_session=False)
             )
-        ).all()
-        existing_service_ids = set(existing_links)
-
-        services_to_add_ids = new_service_ids - existing_service_ids
 
-        # Fetch existing services
-        services_to_add = session.exec(
-            select(TopologyService)
-            .where(TopologyService.tenant_id == tenant_id)
-            .where(TopologyService.id.in_(services_to_add_ids))
-        ).all()
+        # Add new links
+        if services_to_add_ids:
+            # Fetch existing services
+            services_to_add = session.exec(
+                select(TopologyService)
+                .where(TopologyService.tenant_id == tenant_id)
+                .where(TopologyService.id.in_(services_to_add_ids))
+            ).all()
 
-        if len(services_to_add) != len(services_to_add_ids):
-            raise ServiceNotFoundException("One or more services not found")
+            if len(services_to_add) != len(services_to_add_ids):
+                raise ServiceNotFoundException("One or more services not found")
 
-        new_links = [
-            TopologyServiceApplication(
-                service_id=service.id, application_id=application_id
+            session.execute(
+                insert(TopologyServiceApplication),
+                [
+                    {"service_id": service.id, "application_id": application_id}
+                    for service in services_to_add
+                    if service.id
+                ],
             )
-            for service in services_to_add
-            if service.id
-        ]
-        session.add_all(new_links)
 
         session.commit()
         session.refresh(application_db)
@@ -288,12 +340,15 @@ class TopologiesService:
         application: TopologyApplicationDtoIn,
         session: Session,
     ) -> TopologyApplicationDtoOut:
-        # Check if an application with the same name already exists for the tenant
-        existing_application = session.exec(
-            select(TopologyApplication)
-            .where(TopologyApplication.tenant_id == tenant_id)
-            .where(TopologyApplication.id == application.id)
-        ).first()
+        # Check if an application with the same id already exists for the tenant,
+        # going through the identity map before hitting the database
+        existing_application = (
+            session.get(TopologyApplication, application.id)
+            if application.id
+            else None
+        )
+        if existing_application and existing_application.tenant_id != tenant_id:
+            existing_application = None
 
         if existing_application:
             # If the application exists, update it
@@ -354,22 +409,21 @@ class TopologiesService:
         session.flush()  # Get the ID
 
         # Create dependencies
-        for target_service, protocol in dependencies.items():
-            target = session.exec(
-                select(TopologyService).where(
-                    TopologyService.tenant_id == tenant_id,
-                    TopologyService.service == target_service,
-                )
-            ).first()
-            if not target:
+        targets = get_services_by_name(session, tenant_id, list(dependencies))
+        for target_service in dependencies:
+            if target_service not in targets:
                 raise ServiceNotFoundException(f"Service {target_service} not found")
 
-            dependency = TopologyServiceDependency(
-                service_id=db_service.id,
-                depends_on_service_id=target.id,
-                protocol=protocol,
-            )
-            session.add(dependency)
+        session.add_all(
+            [
+                TopologyServiceDependency(
+                    service_id=db_service.id,
+                    depends_on_service_id=targets[target_service].id,
+                    protocol=protocol,
+                )
+                for target_service, protocol in dependencies.items()
+            ]
+        )
 
         session.commit()
         session.refresh(db_service)
@@ -387,9 +441,11 @@ class TopologiesService:
         session: Session,
     ) -> TopologyServiceDtoOut:
         """Update a manual service."""
-        # Get existing service
+        # Get existing service, with the dependencies we diff against below
         db_service = session.exec(
-            select(TopologyService).where(
+            select(TopologyService)
+            .options(selectinload(TopologyService.dependencies))
+            .where(
                 TopologyService.tenant_id == tenant_id,
                 TopologyService.id == service_id,
             )
@@ -412,31 +468,59 @@ class TopologiesService:
             setattr(db_service, key, value)
 
         # Update dependencies
-        # First remove all existing dependencies
-        session.query(TopologyServiceDependency).filter(
-            TopologyServiceDependency.service_id == service_id
-        ).delete()
-
-        # Then create new ones
-        for target_service, protocol in dependencies.items():
-            target = session.exec(
-                select(TopologyService).where(
-                    TopologyService.tenant_id == tenant_id,
-                    TopologyService.service == target_service,
-                )
-            ).first()
-            if not target:
+        targets = get_services_by_name(session, tenant_id, list(dependencies))
+        for target_service in dependencies:
+            if target_service not in targets:
                 raise ServiceNotFoundException(f"Service {target_service} not found")
 
-            dependency = TopologyServiceDependency(
-                service_id=service_id,
-                depends_on_service_id=target.id,
-                protocol=protocol,
+        new_dependencies = {
+            targets[target_service].id: protocol
+            for target_service, protocol in dependencies.items()
+        }
+        current_dependencies = {
+            dependency.depends_on_service_id: dependency
+            for dependency in db_service.dependencies
+        }
+
+        # Only touch the dependencies that actually changed, so an update
+        # that leaves them as they are doesn't rewrite every row
+        stale_target_ids = set(current_dependencies) - set(new_dependencies)
+        if stale_target_ids:
+            session.execute(
+                delete(TopologyServiceDependency)
+                .where(
+                    TopologyServiceDependency.service_id == service_id,
+                    TopologyServiceDependency.depends_on_service_id.in_(
+                        stale_target_ids
+                    ),
+                )
+                .execution_options(synchronize_session=False)
             )
-            session.add(dependency)
+
+        for target_id, protocol in new_dependencies.items():
+            dependency = current_dependencies.get(target_id)
+            if dependency is not None and dependency.protocol != protocol:
+                dependency.protocol = protocol
+
+        session.add_all(
+            [
+                TopologyServiceDependency(
+                    service_id=service_id,
+                    depends_on_service_id=target_id,
+                    protocol=protocol,
+                )
+                for target_id, protocol in new_dependencies.items()
+                if target_id not in current_dependencies
+            ]
+        )
 
         session.commit()
         session.refresh(db_service)
+        # commit() already expires the collection with the default
+        # expire_on_commit=True; this guards sessions created with
+        # expire_on_commit=False, where the collection loaded above would still
+        # hold the rows removed by the bulk delete
+        session.expire(db_service, ["dependencies"])
 
         # Get application IDs for the response
         service_to_app_ids = get_service_application_ids_dict(session, [service_id])
@@ -479,18 +563,15 @@ class TopologiesService:
     ) -> TopologyServiceDtoOut:
         """Create a dependency between two services."""
         # Verify both services exist and belong to tenant
-        service = session.exec(
+        services = session.exec(
             select(TopologyService).where(
                 TopologyService.tenant_id == tenant_id,
-                TopologyService.id == service_id,
-            )
-        ).first()
-        target_service = session.exec(
-            select(TopologyService).where(
-                TopologyService.tenant_id == tenant_id,
-                TopologyService.id == target_service_id,
+                TopologyService.id.in_([service_id, target_service_id]),
             )
-        ).first()
+        ).all()
+        services_by_id = {s.id: s for s in services}
+        service = services_by_id.get(service_id)
+        target_service = services_by_id.get(target_service_id)
 
         if not service:
             raise ServiceNotFoundException(f"Service with ID {service_id} not found")
@@ -545,8 +626,12 @@ class TopologiesService:
             )
 
         # Delete the dependency
-        session.query(TopologyServiceDependency).filter(
-            TopologyServiceDependency.service_id == service_id,
-            TopologyServiceDependency.depends_on_service_id == target_service_id,
-        ).delete()
+        session.execute(
+            delete(TopologyServiceDependency)
+            .where(
+                TopologyServiceDependency.service_id == service_id,
+                TopologyServiceDependency.depends_on_service_id == target_service_id,
+            )
+            .execution_options(synchronize_session=False)
+        )
         session.commit()
@@ -8,6 +8,7 @@ from keep.api.models.db.topology import (
     TopologyApplication,
     TopologyApplicationDtoIn,
     TopologyService,
+    TopologyServiceApplication,
     TopologyServiceDependency,
     TopologyServiceDtoIn,
 )
@@ -69,6 +70,56 @@ def test_get_all_topology_data(db_session):
     assert result[1].service == "test_service_2"
 
 
+def test_get_all_topology_data_filtered_by_services(db_session):
+    service_1 = create_service(db_session, SINGLE_TENANT_UUID, "1")
+    service_2 = create_service(db_session, SINGLE_TENANT_UUID, "2")
+    service_3 = create_service(db_session, SINGLE_TENANT_UUID, "3")
+    service_4 = create_service(db_session, SINGLE_TENANT_UUID, "4")
+
+    # service_3 calls both requested services, service_4 only calls service_3
+    db_session.add_all(
+        [
+            TopologyServiceDependency(
+                service_id=service_3.id,
+                depends_on_service_id=service_1.id,
+                updated_at=datetime.now(),
+            ),
+            TopologyServiceDependency(
+                service_id=service_3.id,
+                depends_on_service_id=service_2.id,
+                updated_at=datetime.now(),
+            ),
+            TopologyServiceDependency(
+                service_id=service_4.id,
+                depends_on_service_id=service_3.id,
+                updated_at=datetime.now(),
+            ),
+        ]
+    )
+    db_session.commit()
+
+    services = " test_service_1, test_service_2,test_service_1 "
+    result = TopologiesService.get_all_topology_data(
+        SINGLE_TENANT_UUID, db_session, services=services, include_empty_deps=True
+    )
+    # Every requested service plus their callers, each returned once
+    assert sorted(service.service for service in result) == [
+        "test_service_1",
+        "test_service_2",
+        "test_service_3",
+    ]
+    caller = next(service for service in result if service.id == service_3.id)
+    assert sorted(dep.serviceId for dep in caller.dependencies) == sorted(
+        [service_1.id, service_2.id]
+    )
+
+    # Requested services without dependencies of their own are filtered out
+    result = TopologiesService.get_all_topology_data(
+        SINGLE_TENANT_UUID, db_session, services=services
+    )
+    assert [service.service for service in result] == ["test_service_3"]
+
+
 def test_get_applications_by_tenant_id(db_session):
     service_1 = create_service(db_session, SINGLE_TENANT_UUID, "1")
     service_2 = create_service(db_session, SINGLE_TENANT_UUID, "2")
@@ -154,6 +205,53 @@ def test_update_application_by_id(db_session):
     assert result.name == "Updated Application"
 
 
+def test_update_application_by_id_services(db_session):
+    service_1 = create_service(db_session, SINGLE_TENANT_UUID, "1")
+    service_2 = create_service(db_session, SINGLE_TENANT_UUID, "2")
+    service_3 = create_service(db_session, SINGLE_TENANT_UUID, "3")
+    application = TopologyApplication(
+        tenant_id=SINGLE_TENANT_UUID,
+        name="Test Application",
+        services=[service_1, service_2],
+    )
+    db_session.add(application)
+    db_session.commit()
+
+    def linked_service_ids():
+        return set(
+            db_session.exec(
+                select(TopologyServiceApplication.service_id).where(
+                    TopologyServiceApplication.application_id == application.id
+                )
+            ).all()
+        )
+
+    # Drop service 1, keep service 2 and add service 3
+    application_dto = TopologyApplicationDtoIn(
+        name="Test Application",
+        services=[
+            TopologyServiceDtoIn(id=service_2.id),
+            TopologyServiceDtoIn(id=service_3.id),
+        ],
+    )
+    result = TopologiesService.update_application_by_id(
+        SINGLE_TENANT_UUID, application.id, application_dto, db_session
+    )
+    assert linked_service_ids() == {service_2.id, service_3.id}
+    assert sorted(service.id for service in result.services) == sorted(
+        [service_2.id, service_3.id]
+    )
+
+    # Adding a service that doesn't exist fails and leaves the links alone
+    application_dto.services.append(TopologyServiceDtoIn(id=123))
+    with pytest.raises(ServiceNotFoundException):
+        TopologiesService.update_application_by_id(
+            SINGLE_TENANT_UUID, application.id, application_dto, db_session
+        )
+    db_session.rollback()
+    assert linked_service_ids() == {service_2.id, service_3.id}
+
+
 def test_delete_application_by_id(db_session):
     application = TopologyApplication(
         tenant_id=SINGLE_TENANT_UUID, name="Test Application"